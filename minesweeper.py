@@ -1,6 +1,50 @@
+import bisect
 import random
 
 
+def _infer_pairs(mask, count, masks, counts, sizes):
+    """
+    Compares a sentence, given as a cells mask and a count, against
+    sentences given as parallel lists of masks, counts and cell counts,
+    sorted by cell count.
+    Yields (mask, count) for each non-empty difference between a
+    sentence and one of its subsets.
+    """
+    # Only strictly smaller sentences can be proper subsets of this one,
+    # and only strictly larger ones can be proper supersets
+    size = mask.bit_count()
+    smaller = bisect.bisect_left(sizes, size)
+    larger = bisect.bisect_right(sizes, size, lo=smaller)
+
+    for i in range(smaller):
+        other_mask, other_count = masks[i], counts[i]
+        if sizes[i] == 0 or other_count > count or other_mask & ~mask:
+            continue
+        yield mask & ~other_mask, count - other_count
+
+    for i in range(larger, len(sizes)):
+        other_mask, other_count = masks[i], counts[i]
+        if count > other_count or mask & ~other_mask:
+            continue
+        yield other_mask & ~mask, other_count - count
+
+
+def _cells_from_mask(mask, width):
+    """
+    Returns the set of cells whose bits are set in a cells mask.
+    """
+    cells = set()
+    while mask:
+        low = mask & -mask
+        cells.add(divmod(low.bit_length() - 1, width))
+        mask ^= low
+    return cells
+
+
+def _sentence_size(sentence):
+    return len(sentence.cells)
+
+
 class Minesweeper():
     """
     Minesweeper game representation
@@ -13,21 +57,29 @@ class Minesweeper():
         self.width = width
         self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
+        # Initialize an empty field with no mines, stored as a bitboard
+        # where bit i * width + j is set when (i, j) is a mine
+        self.board = 0
+
+        # Precompute a bitmask of the in-bounds neighbors of every cell by
+        # shifting a 3x3 block of bits into place, rather than bounds
+        # checking each neighbor. span[j] covers columns j - 1 to j + 1.
+        row_mask = (1 << self.width) - 1
+        board_mask = (1 << (self.height * self.width)) - 1
+        rows = 1 | 1 << self.width | 1 << (2 * self.width)
+        span = [((0b111 << j) >> 1) & row_mask for j in range(self.width)]
+        self._neighbor_mask = [0] * (self.height * self.width)
         for i in range(self.height):
-            row = []
+            shift = (i - 1) * self.width
             for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+                block = span[j] * rows
+                mask = block << shift if shift >= 0 else block >> -shift
+                self._neighbor_mask[i * self.width + j] = (mask & board_mask) ^ (1 << (i * self.width + j))
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, drawing distinct cells without rejection
+        for index in random.sample(range(self.height * self.width), mines):
+            self.mines.add(divmod(index, self.width))
+            self.board |= 1 << index
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -39,17 +91,16 @@ class Minesweeper():
         """
         for i in range(self.height):
             print("--" * self.width + "-")
-            for j in range(self.width):
-                if self.board[i][j]:
-                    print("|X", end="")
-                else:
-                    print("| ", end="")
-            print("|")
+            row = self.board >> (i * self.width)
+            print("".join(
+                "|X" if (row >> j) & 1 else "| "
+                for j in range(self.width)
+            ) + "|")
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool((self.board >> (i * self.width + j)) & 1)
 
     def nearby_mines(self, cell):
         """
@@ -57,23 +108,16 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
-        count = 0
-
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-                if (i, j) == cell:
-                    continue
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return (self.board & self._neighbor_mask[i * self.width + j]).bit_count()
 
     def won(self):
         """
         Checks if all mines have been flagged.
+        Only real mines are ever added to mines_found,
+        so comparing sizes is enough.
         """
-        return self.mines_found == self.mines
+        return len(self.mines_found) == len(self.mines)
 
 
 class Sentence():
@@ -81,15 +125,30 @@ class Sentence():
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+    The cells are also kept as a bitmask, where cell (i, j)
+    is bit i * width + j, for fast subset tests.
     """
 
-    def __init__(self, cells, count):
+    __slots__ = ("cells", "count", "width", "mask", "_frozen", "_hash")
+
+    def __init__(self, cells, count, width=8):
         self.cells = set(cells)
         self.count = count
+        self.width = width
+        self.mask = 0
+        for cell in self.cells:
+            self.mask |= self._bit(cell)
+        self._frozen: frozenset | None = None
+        self._hash: int | None = None
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self.frozen(), self.count))
+        return self._hash
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -109,14 +168,31 @@ class Sentence():
             return self.cells
         return set()
 
+    def frozen(self) -> frozenset:
+        """
+        Returns a cached frozenset snapshot of self.cells.
+        The snapshot (and the cached hash) is rebuilt after the sentence is updated.
+        """
+        if self._frozen is None:
+            self._frozen = frozenset(self.cells)
+        return self._frozen
+
+    def _bit(self, cell) -> int:
+        return 1 << (cell[0] * self.width + cell[1])
+
     def mark_mine(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
+        The count is not clamped, so a negative count exposes
+        a mine marked against an inconsistent sentence.
         """
         if cell in self.cells:
             self.cells.remove(cell)
-            self.count = max(self.count - 1, 0)
+            self.count -= 1
+            self.mask &= ~self._bit(cell)
+            self._frozen = None
+            self._hash = None
 
     def mark_safe(self, cell):
         """
@@ -125,6 +201,9 @@ class Sentence():
         """
         if cell in self.cells:
             self.cells.remove(cell)
+            self.mask &= ~self._bit(cell)
+            self._frozen = None
+            self._hash = None
 
 
 class MinesweeperAI():
@@ -138,24 +217,57 @@ class MinesweeperAI():
         self.height = height
         self.width = width
 
+        # Precompute the in-bounds neighbors of every cell
+        self._neighbor_frozensets: dict[tuple[int, int], frozenset] = {
+            (row, col): frozenset(
+                (row + dr, col + dc)
+                for dr in (-1, 0, 1)
+                for dc in (-1, 0, 1)
+                if (dr or dc) and 0 <= row + dr < height and 0 <= col + dc < width
+            )
+            for row in range(height)
+            for col in range(width)
+        }
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
+        # Cells that are neither clicked on nor known to be mines
+        self._candidates = {(row, col) for row in range(height) for col in range(width)}
+
         # Keep track of cells known to be safe or mines
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
+        # Safe cells that have not been clicked on yet
+        self._pending_safes = set()
+
+        # List of sentences about the game known to be true,
+        # kept sorted by number of cells
         self.knowledge: list[Sentence] = []
 
+        # Index of (cells mask, count) keys of sentences in the knowledge
+        self._knowledge_index: set[tuple[int, int]] = set()
+
+        # Sentences added or updated since they were last compared to the knowledge
+        self._pending_sentences: list[Sentence] = []
+
+        # Sentences in the knowledge that contain each cell
+        self._cell_to_sentences: dict[tuple[int, int], list[Sentence]] = {}
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self._candidates.discard(cell)
+        sentences = self._cell_to_sentences.pop(cell, ())
+        for sentence in sentences:
             sentence.mark_mine(cell)
+            self._pending_sentences.append(sentence)
+        if sentences:
+            self._prune_knowledge()
 
     def mark_safe(self, cell):
         """
@@ -163,8 +275,26 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self._pending_safes.add(cell)
+        sentences = self._cell_to_sentences.pop(cell, ())
+        for sentence in sentences:
             sentence.mark_safe(cell)
+            self._pending_sentences.append(sentence)
+        if sentences:
+            self._prune_knowledge()
+
+    def _prune_knowledge(self):
+        """
+        Drops sentences with no cells left and rebuilds the knowledge index
+        so it reflects the current (cells, count) of each remaining sentence.
+        Emptied sentences need no cleanup in the cell index, since marking
+        their last cell already removed them from it.
+        """
+        self.knowledge = [sentence for sentence in self.knowledge if sentence.cells]
+        self.knowledge.sort(key=_sentence_size)
+        self._pending_sentences = [sentence for sentence in self._pending_sentences if sentence.cells]
+        self._knowledge_index = {(sentence.mask, sentence.count) for sentence in self.knowledge}
 
     def add_knowledge(self, cell, count):
         """
@@ -172,9 +302,26 @@ class MinesweeperAI():
         safe cell, how many neighboring cells have mines in them.
         """
         self.moves_made.add(cell)
+        self._candidates.discard(cell)
         self.mark_safe(cell)
-        self.knowledge.append(self.create_sentence_from_neighbors(cell, count))
-        self.infer_until_convergence();
+        self._pending_safes.discard(cell)
+        self._append_sentence(self.create_sentence_from_neighbors(cell, count))
+        self._saturate()
+
+    def _append_sentence(self, sentence: Sentence) -> bool:
+        """
+        Adds a sentence to the knowledge base unless an identical one was already added.
+        Returns True if the sentence was added.
+        """
+        key = (sentence.mask, sentence.count)
+        if key in self._knowledge_index:
+            return False
+        self._knowledge_index.add(key)
+        bisect.insort(self.knowledge, sentence, key=_sentence_size)
+        self._pending_sentences.append(sentence)
+        for cell in sentence.cells:
+            self._cell_to_sentences.setdefault(cell, []).append(sentence)
+        return True
 
 
     def create_sentence_from_neighbors(self, cell: tuple[int, int], count: int) -> Sentence:
@@ -182,72 +329,54 @@ class MinesweeperAI():
         Constructs a sentence from the unknown neighbors of a revealed safe cell.
         Excludes known safes, mines, and past moves, and adjusts the count if mines are known.
         """
-        neighbors = set()
-
-        for row in range(cell[0] - 1, cell[0] + 2):
-            for col in range(cell[1] - 1, cell[1] + 2):
-                if 0 <= row < self.height and 0 <= col < self.width:
-                    neighbor = (row, col)
-                    if neighbor == cell:
-                        continue
-                    if neighbor in self.mines:
-                        count = max(count - 1, 0)
-                    elif (
-                        neighbor not in self.safes and
-                        neighbor not in self.mines and
-                        neighbor not in self.moves_made
-                    ):
-                        neighbors.add(neighbor)
-
-        return Sentence(neighbors, count)
-
-    def infer_until_convergence(self) -> None:
-        """
-        Repeatedly infers new safes, mines, and sentences until no further knowledge can be gained.
-        """
-        changed = True
-        while changed:
-            changed = False # reset before each iteration
-            if self.infer_cells_from_knowledge():
-                changed = True
-            if self.infer_new_sentences():
-                changed = True
-
-    def infer_cells_from_knowledge(self) -> bool:
-        """
-        Infers and marks additional safe cells and mines based on the current knowledge base.
-        Iterates through all known logical sentences. If a sentence implies that all remaining
-        cells are either safe or mines, those cells are marked accordingly.
-        """
-        changed = False
-        for sentence in self.knowledge:
-            for cell in list(sentence.known_mines()):
-                if cell not in self.mines:
+        neighbors = self._neighbor_frozensets[cell]
+        unknown = neighbors - self.safes - self.mines - self.moves_made
+        known_mines = len(neighbors & self.mines)
+
+        return Sentence(unknown, max(count - known_mines, 0), self.width)
+
+    def _saturate(self) -> None:
+        """
+        Infers new safes, mines, and sentences until no further knowledge can be gained.
+        Works through the pending sentences (new or updated ones), the only sentences whose
+        conclusions or subset relationships can have changed. A pending sentence whose cells
+        are all safe or all mines has them marked, which queues every sentence they touch;
+        otherwise it is compared against the knowledge to derive new sentences, which are
+        queued in turn. Stops when the worklist is empty.
+        """
+        while self._pending_sentences:
+            sentence = self._pending_sentences.pop()
+            known = sentence.known_mines() or sentence.known_safes()
+            if not known:
+                self._infer_new_sentences(sentence)
+            elif sentence.count:
+                for cell in list(known):
                     self.mark_mine(cell)
-                    changed = True
-            for cell in list(sentence.known_safes()):
-                if cell not in self.safes:
+            else:
+                for cell in list(known):
                     self.mark_safe(cell)
-                    changed = True
-        return changed
 
-    def infer_new_sentences(self) -> bool:
+    def _infer_new_sentences(self, sentence: Sentence) -> None:
         """
         Infers new logical sentences by analyzing subset relationships in the knowledge base.
         If one sentence is a subset of another, a new sentence is formed from the difference
         in cells and counts, representing additional knowledge about remaining unknown cells.
-        """
-        changed = False
-        for a in self.knowledge:
-            for b in self.knowledge:
-                if a is b:
-                    continue
-                if b.cells.issubset(a.cells):
-                    new = Sentence(a.cells - b.cells, a.count - b.count)
-                    if new.cells and new not in self.knowledge:
-                        self.knowledge.append(new)
-                        changed = True
-        return changed
+        Because the knowledge is sorted by size, the comparison only scans the sentences
+        that could be a subset or superset of the given one.
+        """
+        others = [other for other in self.knowledge if other is not sentence]
+        new_sentences = _infer_pairs(
+            sentence.mask,
+            sentence.count,
+            [other.mask for other in others],
+            [other.count for other in others],
+            [len(other.cells) for other in others],
+        )
+        for new_mask, new_count in new_sentences:
+            if (new_mask, new_count) in self._knowledge_index:
+                continue
+            new = Sentence(_cells_from_mask(new_mask, self.width), new_count, self.width)
+            self._append_sentence(new)
 
     def make_safe_move(self):
         """
@@ -255,21 +384,11 @@ class MinesweeperAI():
         The move must be known to be safe, and not already a move
         that has been made.
         """
-        for move in self.safes:
-            if move not in self.moves_made:
-                return move
-        return None
+        return next(iter(self._pending_safes), None)
 
     def make_random_move(self):
         """
         Returns a random move that is not known to be a mine
         and has not been made on the Minesweeper board.
         """
-        moves = [
-            (row, col)
-            for row in range(self.height)
-            for col in range(self.width)
-            if (row, col) not in self.moves_made and (row, col) not in self.mines
-        ]
-
-        return random.choice(moves) if moves else None
+        return random.choice(tuple(self._candidates)) if self._candidates else None